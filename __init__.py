@@ -5,12 +5,17 @@ ComfyUI-Trellis
 This extension provides integration between ComfyUI and the Trellis 3D model generation system.
 """
 
+import asyncio
 import os
+import re
 import sys
 import shutil
 from pathlib import Path
 import logging
 import importlib
+import traceback
+import time
+import aiohttp
 from aiohttp import web  # Add this import
 
 # Import debugger
@@ -26,6 +31,7 @@ try:
     app = PromptServer.instance.app
 except ImportError:
     print("Could not import PromptServer. Web endpoints will not be available.")
+    PromptServer = None
     app = None
 
 # At the top after imports
@@ -82,6 +88,98 @@ for directory in directories:
 # Configure file serving - include both paths
 MEDIA_PATHS = [str(path) for path in MEDIA_DIRS]
 
+# Media ids are generated names; the view routes only match ids of this form, so
+# anything else is a 404 from the router before it reaches a path
+MEDIA_ID_PATTERN = "[A-Za-z0-9_-]{1,64}"
+
+# Relative media file names: path segments that don't start with a dot, so no
+# "..", hidden files or absolute paths; checked in one call before any stat
+MEDIA_NAME_RE = re.compile(r"\A(?:[A-Za-z0-9_-][A-Za-z0-9_.-]*/)*[A-Za-z0-9_-][A-Za-z0-9_.-]*\Z")
+
+# Media paths are built by concatenation onto these prefixes
+MEDIA_PREFIXES = [str(path) + os.sep for path in MEDIA_DIRS]
+
+# Output file suffixes in lookup order, each with the headers it is served with
+VIDEO_SUFFIXES = (
+    ("_output.mp4", {"Content-Type": "video/mp4"}),
+    ("_output.webm", {"Content-Type": "video/webm"}),
+    ("_output.mov", {"Content-Type": "video/quicktime"}),
+)
+MODEL_SUFFIXES = (
+    ("_output.glb", {"Content-Type": "model/gltf-binary"}),
+    ("_output.gltf", {"Content-Type": "model/gltf+json"}),
+)
+
+MEDIA_SUFFIXES = {"video": VIDEO_SUFFIXES, "model": MODEL_SUFFIXES}
+
+# Bodies for the 404 a frontend polling a not-yet-written file keeps getting, encoded once
+VIDEO_NOT_FOUND = b"Video not found"
+MODEL_NOT_FOUND = b"Model not found"
+
+# Names in each media dir, rescanned only when the dir's mtime moves and checked at
+# most once per TTL, so polling for an id costs a set lookup instead of a stat per
+# candidate dir and suffix
+MEDIA_INDEX_TTL = 1.0
+_media_index = {}
+
+def _media_names(prefix):
+    """Cached set of file names in a media dir"""
+    now = time.monotonic()
+    entry = _media_index.get(prefix)
+    if entry is not None and now - entry[0] < MEDIA_INDEX_TTL:
+        return entry[2]
+    
+    try:
+        mtime_ns = os.stat(prefix).st_mtime_ns
+    except OSError:
+        mtime_ns, names = None, frozenset()
+    else:
+        if entry is not None and entry[1] == mtime_ns:
+            names = entry[2]
+        else:
+            try:
+                with os.scandir(prefix) as it:
+                    names = frozenset(e.name for e in it if e.is_file())
+            except OSError:
+                names = frozenset()
+    _media_index[prefix] = (now, mtime_ns, names)
+    return names
+
+def find_media(kind, media_id):
+    """First existing output file of a kind for an id as (path, headers), or None"""
+    for prefix in MEDIA_PREFIXES:
+        names = _media_names(prefix)
+        for suffix, headers in MEDIA_SUFFIXES[kind]:
+            name = media_id + suffix
+            if name in names:
+                return prefix + name, headers
+    return None
+
+def stat_media(filename):
+    """(path, stat) of a file name under the first media dir that has it, or None"""
+    for prefix in MEDIA_PREFIXES:
+        file_path = prefix + filename
+        try:
+            return file_path, os.stat(file_path)
+        except OSError:
+            continue
+    return None
+
+def _media_index_due():
+    """Whether the next find_media will have to stat or rescan a media dir"""
+    now = time.monotonic()
+    for prefix in MEDIA_PREFIXES:
+        entry = _media_index.get(prefix)
+        if entry is None or now - entry[0] >= MEDIA_INDEX_TTL:
+            return True
+    return False
+
+async def find_media_async(kind, media_id):
+    """find_media that runs any due directory stat/rescan in the executor, off the event loop"""
+    if _media_index_due():
+        return await asyncio.get_running_loop().run_in_executor(None, find_media, kind, media_id)
+    return find_media(kind, media_id)
+
 # Initialize node mappings
 NODE_CLASS_MAPPINGS = {}
 NODE_DISPLAY_NAME_MAPPINGS = {}
@@ -107,12 +205,20 @@ for module_name, description in node_modules.items():
 
 # Import and initialize web server components
 try:
-    from .webserver import server
+    from .webserver import server, serve_file
     has_web_server = True
     logger.info("Web server components loaded successfully")
 except ImportError:
     logger.warning("Web server components not loaded. Some features may not work correctly.")
     has_web_server = False
+    
+    async def serve_file(request, path, not_found_text, headers=None):
+        """Plain FileResponse for the media routes while webserver.py can't be loaded"""
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, os.stat, path)
+        except OSError:
+            return web.Response(status=404, text=not_found_text)
+        return web.FileResponse(path, headers=headers)
 
 # Print startup information
 print("=" * 80)
@@ -140,23 +246,34 @@ def get_web_files():
             logger.error(f"Web file not found: {file}")
     return files
 
+# Set TRELLIS_DEBUG to accept frontend logs on /trellis/debug
+DEBUG_ENDPOINT = bool(os.environ.get("TRELLIS_DEBUG"))
+
 # Web endpoint registration
 def setup_web_endpoints():
+    if PromptServer is None:
+        logger.warning("Could not import PromptServer. Web endpoints will not be available.")
+        return
+    
     try:
-        from server import PromptServer
         server = PromptServer.instance
         
         @server.routes.get("/trellis/check")
         async def check_trellis(request):
             logger.info("Trellis check endpoint called")
+            web_files = await asyncio.get_running_loop().run_in_executor(None, get_web_files)
             return web.json_response({
                 "status": "ok",
-                "web_files": get_web_files(),
-                "media_paths": MEDIA_PATHS
+                "web_files": web_files,
+                "media_paths": MEDIA_PATHS,
+                "debug": DEBUG_ENDPOINT
             })
             
         @server.routes.post("/trellis/debug")
         async def log_debug(request):
+            # Frontend logs are only collected when asked for; otherwise nothing is read or written
+            if not DEBUG_ENDPOINT:
+                return web.Response(status=404, text="Debug logging disabled")
             try:
                 data = await request.json()
                 # Convert data to string if it's not serializable
@@ -164,7 +281,10 @@ def setup_web_endpoints():
                     data['data'] = [str(x) for x in data['data']]
                 
                 if debugger:
-                    debugger.log_data(
+                    # The debugger writes to its log file, so keep that off the event loop
+                    await asyncio.get_running_loop().run_in_executor(
+                        None,
+                        debugger.log_data,
                         str(data.get('source', 'Unknown')),
                         'Frontend Log',
                         data.get('data', {})
@@ -176,69 +296,73 @@ def setup_web_endpoints():
                     
             except Exception as e:
                 logger.error(f"Error in debug endpoint: {e}")
-                import traceback
                 logger.error(traceback.format_exc())
                 return web.json_response({"status": "error", "message": str(e)}, status=500)
             
         @server.routes.get("/trellis/media-check/{filename:path}")
         async def check_media(request):
             filename = request.match_info['filename']
-            logger.debug(f"Checking media accessibility for: {filename}")
+            # Traversal attempts and junk from scanners are answered without touching the disk
+            if not MEDIA_NAME_RE.match(filename):
+                return web.json_response({"exists": False, "searched": MEDIA_PATHS})
+            logger.debug("Checking media accessibility for: %s", filename)
             
-            # Check both media directories
-            for media_dir in MEDIA_DIRS:
-                file_path = media_dir / filename
-                if file_path.exists():
-                    logger.debug(f"Found file at: {file_path}")
-                    return web.json_response({
-                        "exists": True,
-                        "path": str(file_path),
-                        "size": file_path.stat().st_size
-                    })
+            # Check both media directories, off the event loop
+            found = await asyncio.get_running_loop().run_in_executor(None, stat_media, filename)
+            if found:
+                file_path, st = found
+                logger.debug("Found file at: %s", file_path)
+                return web.json_response({
+                    "exists": True,
+                    "path": file_path,
+                    "size": st.st_size
+                })
             
-            logger.warning(f"File not found: {filename}")
+            logger.debug("File not found: %s", filename)
             return web.json_response({
                 "exists": False,
-                "searched": [str(d) for d in MEDIA_DIRS]
+                "searched": MEDIA_PATHS
             })
             
-        @server.routes.get("/trellis/view-video/{video_id}")
+        @server.routes.get(f"/trellis/view-video/{{video_id:{MEDIA_ID_PATTERN}}}")
         async def view_video(request):
             video_id = request.match_info['video_id']
             logger.debug(f"Video viewer requested for: {video_id}")
             
             # Look for video file with this ID
-            for media_dir in MEDIA_DIRS:
-                for ext in ['.mp4', '.webm', '.mov']:
-                    video_path = media_dir / f"{video_id}_output{ext}"
-                    if video_path.exists():
-                        logger.debug(f"Found video at: {video_path}")
-                        return web.FileResponse(video_path)
+            found = await find_media_async("video", video_id)
+            if not found:
+                logger.warning(f"No video found for ID: {video_id}")
+                return web.Response(status=404, body=VIDEO_NOT_FOUND, content_type="text/plain", charset="utf-8")
             
-            # If no video found, return 404
-            logger.warning(f"No video found for ID: {video_id}")
-            return web.Response(status=404, text="Video not found")
+            # Sent like every other Trellis file; a file gone since the index scan is a 404 there
+            video_path, headers = found
+            logger.debug(f"Found video at: {video_path}")
+            return await serve_file(request, video_path, "Video not found", headers)
 
-        @server.routes.get("/trellis/view-model/{model_id}")
+        @server.routes.get(f"/trellis/view-model/{{model_id:{MEDIA_ID_PATTERN}}}")
         async def view_model(request):
             model_id = request.match_info['model_id']
             logger.debug(f"Model viewer requested for: {model_id}")
             
             # Look for model file with this ID
-            for media_dir in MEDIA_DIRS:
-                for ext in ['.glb', '.gltf']:
-                    model_path = media_dir / f"{model_id}_output{ext}"
-                    if model_path.exists():
-                        logger.debug(f"Found model at: {model_path}")
-                        return web.FileResponse(model_path)
+            found = await find_media_async("model", model_id)
+            if not found:
+                logger.warning(f"No model found for ID: {model_id}")
+                return web.Response(status=404, body=MODEL_NOT_FOUND, content_type="text/plain", charset="utf-8")
             
-            # If no model found, return 404
-            logger.warning(f"No model found for ID: {model_id}")
-            return web.Response(status=404, text="Model not found")
+            # Sent like every other Trellis file; a file gone since the index scan is a 404 there
+            model_path, headers = found
+            logger.debug(f"Found model at: {model_path}")
+            return await serve_file(request, model_path, "Model not found", headers)
 
         logger.info("Trellis web endpoints registered successfully")
-    except ImportError:
-        logger.warning("Could not import PromptServer. Web endpoints will not be available.")
+        
+        # Media goes out through FileResponse, which uses loop.sendfile() unless this is set
+        if os.environ.get("AIOHTTP_NOSENDFILE"):
+            logger.warning("AIOHTTP_NOSENDFILE is set; media files will be copied through user space")
+        else:
+            logger.info(f"Serving media with aiohttp {aiohttp.__version__} via sendfile")
     except Exception as e:
         logger.error(f"Error setting up web endpoints: {e}")
 
@@ -26,11 +26,118 @@ import io
 import numpy as np
 import tempfile
 import logging
+import gzip
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('TrellisNode')
 
+# Brotli is optional; gzip alone still covers every browser
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# mkstemp creates files as 0600; written files get the usual umask-default mode instead
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+def write_atomic(path, data):
+    """Write bytes beside path under a unique name, then rename over it.
+    
+    Readers see the old file or the new one, never a partial write, and two
+    writers never share a temporary file.
+    """
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def write_precompressed(path, data):
+    """Write .gz (and .br when available) siblings so the web server can send them as-is"""
+    write_atomic(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        # Quality 9 is within a few percent of 11 on GLBs at a fraction of the time
+        write_atomic(path + ".br", brotli.compress(data, quality=9))
+
+# Maps each downloaded model id to the SHA-256 of its GLB; read by the web server.
+# It lives beside the downloads directory rather than in it, since that is served as-is.
+MANIFEST_NAME = "manifest.json"
+MANIFEST_DIR_NAME = "trellis_meta"
+
+# Downloads run concurrently; the manifest's read-modify-write must not interleave
+_manifest_lock = threading.Lock()
+
+# Hashing and compressing a model runs here, after the download has been returned,
+# so a node's output never waits on it. One worker keeps the stores in order.
+_store_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trellis-store")
+
+def manifest_path(download_dir):
+    """Where the manifest for a downloads directory is kept"""
+    parent = os.path.dirname(os.path.abspath(download_dir))
+    return os.path.join(parent, MANIFEST_DIR_NAME, MANIFEST_NAME)
+
+def store_content_addressed(output_path, model_id, data):
+    """Keep a GLB under its SHA-256 as well and record the mapping in the manifest.
+    
+    The content file is its own copy, not a link to the download: the
+    download path is rewritten whenever the model is fetched again, and a
+    shared inode would change the "immutable" content file with it.
+    Identical outputs share one content file and one set of precompressed
+    siblings. Files left behind by an id's previous content are removed
+    once nothing in the manifest points at them. Hashing and compression
+    are CPU-bound, so call this from an executor.
+    """
+    directory = os.path.dirname(output_path)
+    digest = hashlib.sha256(data).hexdigest()
+    content_path = os.path.join(directory, f"{digest}.glb")
+    
+    if not os.path.exists(content_path):
+        # Siblings first, so the content file never appears without them
+        write_precompressed(content_path, data)
+        write_atomic(content_path, data)
+    
+    path = manifest_path(directory)
+    with _manifest_lock:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        previous = manifest.get(model_id)
+        manifest[model_id] = digest
+        
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, json.dumps(manifest).encode('utf-8'))
+        
+        # A re-download with new content supersedes the old content file and its siblings
+        if previous and previous != digest and previous not in manifest.values():
+            old_path = os.path.join(directory, f"{previous}.glb")
+            for stale in (old_path, old_path + ".gz", old_path + ".br"):
+                try:
+                    os.unlink(stale)
+                except OSError:
+                    pass
+    return digest
+
+def _log_store_error(future):
+    error = future.exception()
+    if error is not None:
+        logger.error(f"✗ Error storing content-addressed copy: {error}")
+
 # Main Trellis Client for WebSocket communication
 class TrellisClientComfy:
     def __init__(self, server_url, download_dir='trellis_downloads'):
@@ -183,10 +290,16 @@ class TrellisClientComfy:
                 chunks.append(chunk)
                 offset += len(chunk)
             
-            # Write all chunks to file
-            with open(output_path, 'wb') as f:
-                for chunk in chunks:
-                    f.write(chunk)
+            # Write all chunks to file, off the event loop
+            data = b"".join(chunks)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, write_atomic, output_path, data)
+            
+            # Hash and compress models once here rather than per request; MP4 is already compressed.
+            # It runs in the background; until the manifest records the id, the plain GLB is served
+            if file_extension == 'glb':
+                future = _store_executor.submit(store_content_addressed, output_path, session_id, data)
+                future.add_done_callback(_log_store_error)
 
             logger.info(f"✓ Downloaded {file_type} file to {output_path}")
             return output_path
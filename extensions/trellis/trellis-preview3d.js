@@ -14,6 +14,81 @@ async function loadScript(url) {
     });
 }
 
+// Preview ids queued for the next batch request, mapped to their nodes
+const pendingPreviews = new Map();
+let batchTimer = null;
+
+// Fetch thumbnails for all recently executed nodes in one request. Rendered ones
+// come back inline; only those still rendering are polled for node by node
+function setupModelPreview(node, fileId) {
+    pendingPreviews.set(fileId, node);
+    if (batchTimer) return;
+    
+    batchTimer = setTimeout(async () => {
+        const batch = new Map(pendingPreviews);
+        pendingPreviews.clear();
+        batchTimer = null;
+        
+        try {
+            const response = await fetch('/trellis/previews/batch?ids=' + [...batch.keys()].join(','));
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            
+            const manifest = await response.json();
+            for (const file of manifest.files) {
+                const target = batch.get(file.file_id);
+                const img = target?.thumbEl;
+                if (!img || img.dataset.thumbnail !== file.file_id) continue;
+                
+                if (file.thumbnail_data) {
+                    img.onload = () => { img.style.display = "block"; };
+                    img.src = `data:image/png;base64,${file.thumbnail_data}`;
+                } else if (file.thumbnail) {
+                    loadThumbnail(img, file.thumbnail, file.file_id);
+                }
+            }
+        } catch (error) {
+            console.error("Failed to fetch preview batch:", error);
+            
+            // Fall back to asking for each thumbnail on its own
+            for (const [id, target] of batch) {
+                if (target.thumbEl?.dataset.thumbnail === id) {
+                    loadThumbnail(target.thumbEl, `/trellis/thumb/${id}`, id);
+                }
+            }
+        }
+    }, 50);
+}
+
+// Thumbnails render in the background and the server answers 202 until the PNG
+// exists, so poll with exponential backoff and only show the image once it is there
+async function loadThumbnail(img, url, fileId, attempt = 0) {
+    if (img.dataset.thumbnail !== fileId) return;  // the node has run again since
+    
+    try {
+        const response = await fetch(url, { cache: 'no-cache' });
+        if (img.dataset.thumbnail !== fileId) return;
+        
+        if (response.status === 202 && attempt < 8) {
+            setTimeout(() => loadThumbnail(img, url, fileId, attempt + 1), Math.min(500 * 2 ** attempt, 8000));
+            return;
+        }
+        if (response.status !== 200) {
+            img.style.display = "none";
+            return;
+        }
+        
+        const objectUrl = URL.createObjectURL(await response.blob());
+        img.onload = () => {
+            URL.revokeObjectURL(objectUrl);
+            img.style.display = "block";
+        };
+        img.src = objectUrl;
+    } catch (error) {
+        console.error("Failed to load thumbnail:", error);
+        img.style.display = "none";
+    }
+}
+
 // Register extension
 app.registerExtension({
     name: "Trellis.Preview3D",
@@ -107,10 +182,26 @@ app.registerExtension({
                         this.statusEl.appendChild(this.viewBtn);
                     }
                     
-                    // Update button action
+                    // Show the pre-rendered snapshot; the full viewer only opens on click
+                    if (preview.thumbnail) {
+                        if (!this.thumbEl) {
+                            this.thumbEl = document.createElement("img");
+                            this.thumbEl.style.marginTop = "6px";
+                            this.thumbEl.style.maxWidth = "100%";
+                            this.thumbEl.onerror = () => { this.thumbEl.style.display = "none"; };
+                        }
+                        // Re-attach since updating the status text clears the element's children
+                        this.statusEl.appendChild(this.thumbEl);
+                        this.thumbEl.style.display = "none";
+                        this.thumbEl.dataset.thumbnail = preview.file_id;
+                        
+                        // Fetched together with the thumbnails of any other nodes that just ran
+                        setupModelPreview(this, preview.file_id);
+                    }
+                    
+                    // Update button action; the model is only fetched when the viewer opens
                     this.viewBtn.onclick = () => {
-                        const url = `/trellis/preview/files/${preview.file_id}`;
-                        window.open(url, '_blank');
+                        window.open(`/trellis/preview/files/${preview.file_id}`, '_blank');
                     };
                 }
             }
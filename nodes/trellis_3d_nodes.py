@@ -1,4 +1,5 @@
 import os
+import shutil
 import logging
 from pathlib import Path
 from .trellis_debug import debugger
@@ -76,7 +77,6 @@ class TrellisModelLoaderNode:
                 
                 # Copy file to target location
                 target_path = os.path.join(target_dir, filename)
-                import shutil
                 shutil.copy2(file_path, target_path)
                 
                 # Convert to GLB if needed
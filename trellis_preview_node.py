@@ -1,12 +1,318 @@
 import os
 import json
+import asyncio
+import base64
+import html
 import hashlib
+import re
 import logging
-from server import PromptServer
+import string
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path, PurePosixPath
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
 from aiohttp import web
 
 logger = logging.getLogger('TrellisPreview')
 
+try:
+    from server import PromptServer
+    routes = PromptServer.instance.routes
+except ImportError:
+    logger.warning("Could not import PromptServer. Preview endpoints will not be available.")
+    PromptServer = None
+    routes = web.RouteTableDef()
+
+# Optional faster non-cryptographic hash for preview IDs
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Optional faster JSON encoder for batch manifests, which carry inlined base64 thumbnails
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Read size for preview FileResponses when sendfile isn't available; models are multi-MB
+PREVIEW_CHUNK_SIZE = 1024 * 1024
+
+# Edge length of the PNG snapshot rendered for each previewed model
+THUMBNAIL_SIZE = 256
+
+# Rendered thumbnails up to this size are inlined as base64 in batch preview responses
+THUMBNAIL_INLINE_LIMIT = 256 * 1024
+
+# Thumbnails are rendered off the node execution thread, one at a time
+_thumbnail_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trellis-thumbnail")
+
+# Renders queued or in progress, by model path, so the thumbnail route can tell
+# "not rendered yet" apart from "never will be"
+_thumbnail_jobs = {}
+
+# Set once trimesh/pyrender turn out to be missing; no further renders are queued
+_thumbnail_unavailable = False
+
+def _thumbnail_path(model_path):
+    """Location of the cached snapshot for a model file"""
+    return model_path + ".thumb.png"
+
+def _thumbnail_is_fresh(model_path):
+    """A thumbnail is valid while its mtime matches the model it was rendered from"""
+    try:
+        return os.path.getmtime(_thumbnail_path(model_path)) == os.path.getmtime(model_path)
+    except OSError:
+        return False
+
+def _submit_thumbnail(model_path):
+    """Queue a background render for a model and track it until it finishes"""
+    future = _thumbnail_executor.submit(_render_thumbnail, model_path)
+    _thumbnail_jobs[model_path] = future
+    
+    def _forget(done):
+        # A newer render for the same path may have replaced this one meanwhile
+        if _thumbnail_jobs.get(model_path) is done:
+            del _thumbnail_jobs[model_path]
+    future.add_done_callback(_forget)
+
+def _render_thumbnail(model_path):
+    """Render a low-res PNG snapshot of a GLB and store it next to the model"""
+    global _thumbnail_unavailable
+    if _thumbnail_unavailable or _thumbnail_is_fresh(model_path):
+        return
+    
+    try:
+        import numpy as np
+        import trimesh
+        import pyrender
+        from PIL import Image
+    except ImportError:
+        _thumbnail_unavailable = True
+        logger.warning("trimesh/pyrender not installed, thumbnails are disabled")
+        return
+    
+    try:
+        mesh_scene = trimesh.load(model_path, force='scene')
+        scene = pyrender.Scene.from_trimesh_scene(mesh_scene, ambient_light=[0.3, 0.3, 0.3])
+        
+        # Frame the model from the front, far enough back to fit its extent
+        camera_pose = np.eye(4)
+        camera_pose[:3, 3] = mesh_scene.centroid + [0, 0, mesh_scene.scale * 1.5]
+        scene.add(pyrender.PerspectiveCamera(yfov=np.pi / 4), pose=camera_pose)
+        scene.add(pyrender.DirectionalLight(intensity=3.0), pose=camera_pose)
+        
+        renderer = pyrender.OffscreenRenderer(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        try:
+            color, _ = renderer.render(scene)
+        finally:
+            renderer.delete()
+        
+        thumbnail_path = _thumbnail_path(model_path)
+        Image.fromarray(color).save(thumbnail_path)
+        
+        # Stamp the thumbnail with the model's mtime so staleness is a single compare
+        st = os.stat(model_path)
+        os.utime(thumbnail_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        logger.info("Rendered thumbnail: %s", thumbnail_path)
+    except Exception as e:
+        logger.error("Error rendering thumbnail for %s: %s", model_path, e)
+
+# Set TRELLIS_DEBUG_HTML to keep generated pages readable
+DEBUG_HTML = bool(os.environ.get("TRELLIS_DEBUG_HTML"))
+
+_LEADING_WHITESPACE_RE = re.compile(r'^\s+', re.M)
+_HTML_COMMENT_RE = re.compile(r'<!--.*?-->\n?', re.S)
+_JS_LINE_COMMENT_RE = re.compile(r'^//.*\n', re.M)
+_STYLE_BLOCK_RE = re.compile(r'(<style>)(.*?)(</style>)', re.S)
+_CSS_PUNCTUATION_RE = re.compile(r'\s*([{};:,])\s*')
+
+def _minify_css(match):
+    opening, css, closing = match.groups()
+    return opening + _CSS_PUNCTUATION_RE.sub(r'\1', css) + closing
+
+def _minify_html(source):
+    """Shrink a page template once at import.
+    
+    Indentation, blank lines, HTML comments and whole-line JS comments are
+    dropped, and CSS is packed around its punctuation. Newlines are kept,
+    so the inline script is never exposed to semicolon insertion pitfalls.
+    """
+    if DEBUG_HTML:
+        return source
+    source = _LEADING_WHITESPACE_RE.sub('', source)
+    source = _HTML_COMMENT_RE.sub('', source)
+    source = _JS_LINE_COMMENT_RE.sub('', source)
+    return _STYLE_BLOCK_RE.sub(_minify_css, source)
+
+# Viewer page written next to each model, built once at import and filled in per call
+_VIEWER_TEMPLATE = string.Template(_minify_html("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Trellis 3D Model Viewer</title>
+    <style>
+        body { margin: 0; padding: 0; overflow: hidden; }
+        #viewer-container { width: 100%; height: 100vh; position: absolute; }
+    </style>
+    
+    <!-- Three.js and required addons; deferred scripts download in parallel but still run in order -->
+    <link rel="preconnect" href="https://unpkg.com">
+    <script defer src="https://unpkg.com/three@0.132.2/build/three.min.js"></script>
+    <script defer src="https://unpkg.com/three@0.132.2/examples/js/controls/OrbitControls.js"></script>
+    <script defer src="https://unpkg.com/three@0.132.2/examples/js/loaders/GLTFLoader.js"></script>
+    <script defer src="https://unpkg.com/three@0.132.2/examples/js/loaders/DRACOLoader.js"></script>
+    <script defer src="https://unpkg.com/three@0.132.2/examples/js/loaders/KTX2Loader.js"></script>
+    <script defer src="https://unpkg.com/three@0.132.2/examples/js/libs/meshopt_decoder.js"></script>
+    <script defer src="https://unpkg.com/three@0.132.2/examples/js/loaders/OBJLoader.js"></script>
+    <script defer src="https://unpkg.com/three@0.132.2/examples/js/loaders/MTLLoader.js"></script>
+    <script defer src="https://unpkg.com/three@0.132.2/examples/js/environments/RoomEnvironment.js"></script>
+    <script defer src="https://unpkg.com/three@0.132.2/examples/js/utils/SkeletonUtils.js"></script>
+    
+    <!-- Our custom viewer modules -->
+    <script defer src="../web/js/ModelViewer.js"></script>
+    <script defer src="../web/js/ModelLoader.js"></script>
+    <script defer src="../web/js/ViewerUI.js"></script>
+    <script defer src="../web/js/TrellisViewer.js"></script>
+</head>
+<body>
+    <div id="viewer-container"></div>
+    
+    <script>
+        var config = $config_json;
+        
+        document.addEventListener('DOMContentLoaded', function() {
+            // Initialize viewer
+            var viewer = TrellisViewer.create({
+                container: document.getElementById('viewer-container'),
+                viewer: config.viewer,
+                ui: {
+                    showControls: true,
+                    showProgress: true,
+                    showModelInfo: true,
+                    theme: 'dark'
+                }
+            });
+            
+            // Load the model
+            viewer.loadModel(config.modelPath, { format: config.modelFormat });
+            
+            // Handle window resize
+            window.addEventListener('resize', function() {
+                viewer.resize();
+            });
+            
+            // Stop rendering and release GPU memory when the page goes away
+            window.addEventListener('beforeunload', function() {
+                viewer.destroy();
+            });
+        });
+    </script>
+</body>
+</html>
+"""))
+
+_ERROR_TEMPLATE = string.Template(_minify_html("""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Trellis 3D Model Viewer</title>
+    <style>
+        body { margin: 0; padding: 20px; background: #222; color: #ff5555; font-family: sans-serif; }
+    </style>
+</head>
+<body>
+    <h3>Unable to display model</h3>
+    <p>$error_message</p>
+</body>
+</html>
+"""))
+
+# Generated viewer pages live here; created once at import rather than per call
+_VIEWER_DIR = (Path("trellis_files") / "viewers").absolute()
+_VIEWER_DIR.mkdir(parents=True, exist_ok=True)
+
+def _write_html(html_content, out_path):
+    """Write a generated page in one call, skipping the text I/O layer"""
+    html_bytes = html_content.encode('utf-8')
+    try:
+        out_path.write_bytes(html_bytes)
+    except FileNotFoundError:
+        # The directory was removed while running; recreate it and retry
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_bytes(html_bytes)
+
+class _LazyHTML:
+    """Stands in for a page that is already on disk; read back only when converted to str"""
+    __slots__ = ('path',)
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def __str__(self):
+        return Path(self.path).read_text(encoding='utf-8')
+
+def _read_viewer_meta(meta_path):
+    """Cache key recorded next to a viewer page when it was written, or None"""
+    try:
+        return json.loads(meta_path.read_text(encoding='utf-8')).get("key")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _viewer_is_current(viewer_path, cache_key):
+    """Whether the page on disk still holds what was written for this key"""
+    return (_read_viewer_meta(viewer_path.with_suffix(".meta")) == list(cache_key)
+            and viewer_path.exists())
+
+# Viewers already written this session, keyed by model path, mtime and options
+_viewer_cache = {}
+
+@lru_cache(maxsize=128)
+def _build_viewer_html(model_path, model_format, background_color, auto_rotate, camera_distance):
+    """Render the viewer page for a model; identical inputs reuse the cached page"""
+    # All per-page values go through one compact json.dumps, which yields a valid, escaped JS literal
+    config = {
+        "modelPath": model_path,
+        "modelFormat": model_format,
+        "viewer": {
+            "backgroundColor": int(background_color.lstrip("#"), 16),
+            "cameraPosition": [0, 1, camera_distance],
+            "controlsAutoRotate": auto_rotate == "enabled"
+        }
+    }
+    config_json = json.dumps(config, separators=(',', ':'))
+    
+    # A "</script>" inside a path would otherwise end the inline script early
+    return _VIEWER_TEMPLATE.substitute(config_json=config_json.replace("<", "\\u003c"))
+
+# A registered preview file; a flat tuple is far lighter per entry than a dict
+PreviewFile = namedtuple("PreviewFile", ("path", "type", "mtime"))
+
+def _file_registry():
+    """Files registered for preview on the running server, created on first use"""
+    if PromptServer is None:
+        return None
+    registry = getattr(PromptServer.instance, 'trellis_files', None)
+    if registry is None:
+        registry = PromptServer.instance.trellis_files = {}
+    return registry
+
+@lru_cache(maxsize=512)
+def _preview_id(abs_path):
+    """Short, stable preview ID for a file.
+    
+    A 64-bit digest keeps IDs at 16 hex characters regardless of path length
+    and doesn't expose the path in URLs. This is only a lookup key, so no
+    cryptographic strength is needed: xxh3 is used when xxhash is installed,
+    BLAKE2b otherwise.
+    """
+    path_bytes = os.fsencode(abs_path)
+    if xxhash is not None:
+        return f"preview_{xxhash.xxh3_64_hexdigest(path_bytes)}"
+    return f"preview_{hashlib.blake2b(path_bytes, digest_size=8).hexdigest()}"
+
 class TrellisPreview3DNode:
     """Node that previews 3D models directly in ComfyUI"""
     
@@ -27,7 +333,13 @@ class TrellisPreview3DNode:
     OUTPUT_NODE = True
     
     def preview_file(self, file_path, file_type="auto"):
-        if not file_path or not os.path.exists(file_path):
+        if not file_path:
+            return {"ui": {"status": "waiting"}}
+        
+        # One stat both checks existence and gives the mtime used below
+        try:
+            st = os.stat(file_path)
+        except OSError:
             return {"ui": {"status": "waiting"}}
         
         # Auto-detect file type if needed
@@ -40,176 +352,233 @@ class TrellisPreview3DNode:
             else:
                 return {"ui": {"status": "error", "message": f"Unsupported file type: {ext}"}}
         
-        # Generate a unique file ID based on file path
-        file_hash = hashlib.md5(os.path.abspath(file_path).encode()).hexdigest()
-        file_id = f"preview_{file_hash}"
+        abs_path = os.path.abspath(file_path)
+        file_id = _preview_id(abs_path)
         
         # Register file for serving
-        if not hasattr(PromptServer.instance, 'trellis_files'):
-            PromptServer.instance.trellis_files = {}
+        registry = _file_registry()
+        if registry is None:
+            return {"ui": {"status": "error", "message": "ComfyUI server not available"}}
+        
+        # Re-running on an unchanged file keeps the existing registration
+        mtime = st.st_mtime
+        registered = registry.get(file_id)
+        is_new = not registered or registered.mtime != mtime or registered.type != file_type
         
-        PromptServer.instance.trellis_files[file_id] = {
-            "path": os.path.abspath(file_path),
-            "type": file_type,
-            "mtime": os.path.getmtime(file_path)
+        if is_new:
+            registry[file_id] = PreviewFile(abs_path, file_type, mtime)
+            
+            logger.info("Registered file for preview: %s (ID: %s)", file_path, file_id)
+        
+        preview = {
+            "file_id": file_id,
+            "file_type": file_type
         }
         
-        logger.info(f"Registered file for preview: {file_path} (ID: {file_id})")
+        # Render a static snapshot in the background so the UI doesn't need a live scene
+        if file_type == "model" and not _thumbnail_unavailable:
+            if is_new:
+                _submit_thumbnail(abs_path)
+            preview["thumbnail"] = f"/trellis/thumb/{file_id}"
         
         # Return data for UI
         return {
             "ui": {
                 "status": "ready",
-                "preview": {
-                    "file_id": file_id,
-                    "file_type": file_type
-                }
-            }
-        }
-    
-class TrellisModelViewerNode:
-    """Node that previews 3D models directly in ComfyUI"""
-    
-    @classmethod
-    def INPUT_TYPES(cls):
-        return {
-            "required": {
-                "file_path": ("STRING", {"default": ""}),
-            },
-            "optional": {
-                "file_type": (["auto", "model", "video"], {"default": "auto"}),
+                "preview": preview
             }
         }
     
-    RETURN_TYPES = ()
-    FUNCTION = "preview_file"
-    CATEGORY = "Trellis"
-    OUTPUT_NODE = True
+class TrellisModelViewerNode(TrellisPreview3DNode):
+    """Preview node that can also write a standalone viewer page for a GLB"""
     
-    # def create_viewer(self, glb_path, ...): # Add this line     
     def create_viewer(self, glb_path, background_color="#222222", display_width=800, 
                     display_height=600, auto_rotate="enabled", camera_distance=2.0):
         try:
-            glb_path = Path(glb_path)  # Convert to Path object
-            if not glb_path or not glb_path.exists():
-                logger.error(f"GLB file not found: {glb_path}")
+            # Make absolute once and derive every name below from that string.
+            # abspath is pure string work; resolve() would lstat every path component.
+            abs_path = os.path.abspath(glb_path)
+            stem, ext = os.path.splitext(os.path.basename(abs_path))
+            try:
+                st = os.stat(abs_path)
+            except OSError:
+                logger.error("GLB file not found: %s", abs_path)
                 return self.create_error_html("Model file not found or invalid path"), ""
             
-            # Create a unique viewer filename
-            viewer_dir = Path("trellis_files") / "viewers"
-            viewer_dir.mkdir(parents=True, exist_ok=True)
+            # Point the page at the preview route when the server is up: it is served over HTTP
+            # with byte-range support, so the browser isn't left fetching a filesystem path
+            file_id = _preview_id(abs_path)
+            registry = _file_registry()
+            if registry is not None:
+                registry[file_id] = PreviewFile(abs_path, "model", st.st_mtime)
+                model_url = f"/trellis/preview/files/{file_id}"
+            else:
+                # Get relative path to model file as a URL; Windows separators would break it
+                relative_model_path = os.path.relpath(abs_path, _VIEWER_DIR)
+                model_url = quote(PurePosixPath(*Path(relative_model_path).parts).as_posix())
             
-            viewer_filename = f"view_{glb_path.name.replace('.glb', '')}.html"
-            viewer_path = viewer_dir / viewer_filename
+            # Reuse the page from a previous run if neither the model nor the options changed
+            cache_key = (abs_path, st.st_mtime, model_url,
+                         background_color, auto_rotate, camera_distance)
+            cached = _viewer_cache.get(cache_key)
+            if cached and _viewer_is_current(cached[1], cache_key):
+                return cached
             
-            # Get relative path to model file
-            relative_model_path = glb_path.relative_to(viewer_path.parent)
-        
-                    # Configure viewer settings
-            auto_rotate_value = "true" if auto_rotate == "enabled" else "false"
+            # Name the page after the model's path id too, so two models that share a
+            # file name in different directories never overwrite each other's page
+            viewer_filename = f"view_{stem}_{file_id}.html"
+            viewer_path = _VIEWER_DIR / viewer_filename
+            
+            # A page from an earlier session is still valid if its sidecar records the same key
+            meta_path = viewer_path.with_suffix(".meta")
+            if _viewer_is_current(viewer_path, cache_key):
+                result = (_LazyHTML(viewer_path), viewer_path)
+                _viewer_cache[cache_key] = result
+                return result
             
             # Create the HTML content with our modular JS viewer
-            html_content = f"""<!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Trellis 3D Model Viewer</title>
-        <style>
-            body {{ margin: 0; padding: 0; overflow: hidden; }}
-            #viewer-container {{ width: 100%; height: 100vh; position: absolute; }}
-        </style>
-        
-        <!-- Three.js and required addons -->
-        <script src="https://unpkg.com/three@0.132.2/build/three.min.js"></script>
-        <script src="https://unpkg.com/three@0.132.2/examples/js/controls/OrbitControls.js"></script>
-        <script src="https://unpkg.com/three@0.132.2/examples/js/loaders/GLTFLoader.js"></script>
-        <script src="https://unpkg.com/three@0.132.2/examples/js/loaders/DRACOLoader.js"></script>
-        <script src="https://unpkg.com/three@0.132.2/examples/js/loaders/OBJLoader.js"></script>
-        <script src="https://unpkg.com/three@0.132.2/examples/js/loaders/MTLLoader.js"></script>
-        <script src="https://unpkg.com/three@0.132.2/examples/js/environments/RoomEnvironment.js"></script>
-        
-        <!-- Our custom viewer modules -->
-        <script src="../web/js/ModelViewer.js"></script>
-        <script src="../web/js/ModelLoader.js"></script>
-        <script src="../web/js/ViewerUI.js"></script>
-        <script src="../web/js/TrellisViewer.js"></script>
-    </head>
-    <body>
-        <div id="viewer-container"></div>
-        
-        <script>
-            document.addEventListener('DOMContentLoaded', function() {{
-                // Initialize viewer
-                var viewer = TrellisViewer.create({{
-                    container: document.getElementById('viewer-container'),
-                    viewer: {{
-                        backgroundColor: parseInt('{background_color.replace("#", "0x")}'),
-                        cameraPosition: [0, 1, {camera_distance}],
-                        controlsAutoRotate: {auto_rotate_value}
-                    }},
-                    ui: {{
-                        showControls: true,
-                        showProgress: true,
-                        showModelInfo: true,
-                        theme: 'dark'
-                    }}
-                }});
-                
-                // Load the model
-                viewer.loadModel('{relative_model_path}');
-                
-                // Handle window resize
-                window.addEventListener('resize', function() {{
-                    viewer.resize();
-                }});
-            }});
-        </script>
-    </body>
-    </html>
-    """
+            model_format = ext.lstrip(".").lower()
+            html_content = _build_viewer_html(model_url, model_format, background_color,
+                                              auto_rotate, camera_distance)
+            
+            _write_html(html_content, viewer_path)
             
-            # Write the HTML file
-            with open(viewer_path, 'w') as f:
-                f.write(html_content)
+            logger.info("Created 3D viewer at: %s", viewer_path)
             
-            logger.info(f"Created 3D viewer at: {viewer_path}")
+            meta_path.write_text(json.dumps({"key": list(cache_key)}), encoding='utf-8')
             
-            return html_content, viewer_path
+            # The page lives on disk, so callers get a lazy handle rather than a second copy
+            result = (_LazyHTML(viewer_path), viewer_path)
+            _viewer_cache[cache_key] = result
+            return result
             
         except Exception as e:
-            logger.error(f"Error creating viewer: {e}")
+            logger.error("Error creating viewer: %s", e)
             return self.create_error_html(str(e)), ""
+    
+    def create_error_html(self, error_message):
+        """Build a minimal page explaining why the viewer couldn't be created"""
+        return _ERROR_TEMPLATE.substitute(error_message=html.escape(error_message, quote=True))
 
 
 
+def _content_type(file_info):
+    """Map a registered file type to the content type it is served with"""
+    if file_info.type == "model":
+        return "model/gltf-binary"
+    elif file_info.type == "video":
+        return "video/mp4"
+    return "application/octet-stream"
+
 # Add web routes
-@PromptServer.instance.routes.get("/trellis/preview/files/{file_id}")
+@routes.get("/trellis/preview/files/{file_id}")
 async def get_preview_file(request):
     """Serve the preview file"""
     file_id = request.match_info["file_id"]
     
     # Get the file info
-    if not hasattr(PromptServer.instance, 'trellis_files'):
-        return web.Response(status=404, text="File registry not found")
-    
-    file_info = PromptServer.instance.trellis_files.get(file_id)
+    file_info = _file_registry().get(file_id)
     if not file_info:
         return web.Response(status=404, text="File not found")
     
-    file_path = file_info["path"]
-    if not os.path.exists(file_path):
+    file_path = file_info.path
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(None, os.path.exists, file_path):
         return web.Response(status=404, text="File no longer exists")
     
-    # Determine content type
-    content_type = "application/octet-stream"
-    if file_info["type"] == "model":
-        content_type = "model/gltf-binary"
-    elif file_info["type"] == "video":
-        content_type = "video/mp4"
+    # Serve the file; FileResponse answers Range requests, so advertise it
+    return web.FileResponse(file_path, chunk_size=PREVIEW_CHUNK_SIZE, headers={
+        "Content-Type": _content_type(file_info),
+        "Accept-Ranges": "bytes"
+    })
+
+@routes.get("/trellis/thumb/{file_id}")
+async def get_preview_thumbnail(request):
+    """Serve the pre-rendered snapshot of a registered model"""
+    file_id = request.match_info["file_id"]
+    
+    file_info = _file_registry().get(file_id)
+    if not file_info or file_info.type != "model":
+        return web.Response(status=404, text="File not found")
+    
+    # Two stats; run them off the event loop like the other preview probes
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(None, _thumbnail_is_fresh, file_info.path):
+        # 202 tells the client to poll again; once no render is pending it never will be ready
+        if file_info.path in _thumbnail_jobs:
+            return web.Response(status=202, text="Thumbnail not rendered yet",
+                                headers={"Retry-After": "1", "Cache-Control": "no-store"})
+        return web.Response(status=404, text="Thumbnail not available")
+    
+    return web.FileResponse(_thumbnail_path(file_info.path), headers={"Content-Type": "image/png"})
+
+def _json_body(obj):
+    """obj as UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+def _inline_thumbnail(model_path):
+    """A rendered thumbnail as base64, or None if it isn't ready or is too large to inline"""
+    if not _thumbnail_is_fresh(model_path):
+        return None
+    try:
+        with open(_thumbnail_path(model_path), 'rb') as f:
+            data = f.read(THUMBNAIL_INLINE_LIMIT + 1)
+    except OSError:
+        return None
+    if len(data) > THUMBNAIL_INLINE_LIMIT:
+        return None
+    return base64.b64encode(data).decode('ascii')
+
+def _collect_batch(ids):
+    """Manifest entries for a batch, with ready thumbnails inlined"""
+    registry = _file_registry()
+    files = []
+    
+    for file_id in ids:
+        file_info = registry.get(file_id)
+        try:
+            size = os.stat(file_info.path).st_size if file_info else None
+        except OSError:
+            size = None
+        if size is None:
+            files.append({"file_id": file_id, "status": "missing"})
+            continue
+        
+        entry = {
+            "file_id": file_id,
+            "status": "ready",
+            "content_type": _content_type(file_info),
+            "size": size
+        }
+        if file_info.type == "model":
+            thumbnail = _inline_thumbnail(file_info.path)
+            if thumbnail is not None:
+                entry["thumbnail_data"] = thumbnail
+            elif file_info.path in _thumbnail_jobs:
+                # Still rendering; the client polls the thumbnail URL for this one only
+                entry["thumbnail"] = f"/trellis/thumb/{file_id}"
+        files.append(entry)
+    
+    return files
+
+@routes.get("/trellis/previews/batch")
+async def get_preview_batch(request):
+    """Describe several registered previews in one JSON response.
+    
+    Thumbnails that are already rendered come inline as base64, so a run of
+    many preview nodes shows every snapshot after a single round trip.
+    Models themselves are not included; the viewer fetches them when opened.
+    """
+    ids = [file_id for file_id in request.query.get("ids", "").split(",") if file_id]
+    if not ids:
+        return web.Response(status=400, text="No preview ids given")
     
-    # Serve the file
-    return web.FileResponse(file_path, headers={"Content-Type": content_type})
+    # Stats and thumbnail reads are blocking disk work, so they run off the event loop
+    loop = asyncio.get_running_loop()
+    files = await loop.run_in_executor(None, _collect_batch, ids)
+    return web.Response(body=_json_body({"files": files}), content_type="application/json")
 
 # Register nodes
 NODE_CLASS_MAPPINGS = {
@@ -2,14 +2,36 @@
  * ModelLoader - A model loading system for the ModelViewer
  */
 
+/**
+ * Parsed GLTF results shared by every loader on the page, keyed by URL.
+ * Each entry holds a promise, so concurrent loads of one URL fetch and decode
+ * once, and a count of the loaders showing it. The GPU resources are freed
+ * when the last of them lets go; until then viewers leave them alone.
+ */
+ModelLoader.gltfCache = new Map();
+
+/**
+ * Models with more triangles than this are revealed progressively,
+ * at most this many newly shown triangles per frame
+ */
+ModelLoader.TRIANGLE_BUDGET = 500000;
+
 function ModelLoader(viewer) {
   this.viewer = viewer;
   this.loaders = {};
   this.currentUrl = null;
   this.currentModelType = null;
+  this._gltfEntry = null;
+  this._gltfLoad = null;
   
   // Initialize loaders
   this._initLoaders();
+  
+  // Hand the cached model back before the viewer frees what it owns
+  var self = this;
+  viewer.addEventListener('dispose', function() {
+    self.release();
+  });
 }
 
 /**
@@ -24,8 +46,28 @@ ModelLoader.prototype._initLoaders = function() {
   this.loaders.gltf = new THREE.GLTFLoader(this.viewer.loadingManager);
   
   var dracoLoader = new THREE.DRACOLoader();
-  dracoLoader.setDecoderPath('https://unpkg.com/three@latest/examples/jsm/libs/draco/gltf/');
+  dracoLoader.setDecoderPath('https://www.gstatic.com/draco/versioned/decoders/1.5.6/');
+  
+  // The WASM decoder is several times faster than the JS fallback
+  dracoLoader.setDecoderConfig({ type: 'wasm' });
+  
+  // Start the decoder worker now instead of inside the first load callback,
+  // so the WASM fetch runs in parallel with the model download
+  dracoLoader.preload();
   this.loaders.gltf.setDRACOLoader(dracoLoader);
+  
+  // GPU-compressed (KTX2/Basis) textures, when the page includes the loader
+  if (THREE.KTX2Loader) {
+    var ktx2Loader = new THREE.KTX2Loader(this.viewer.loadingManager);
+    ktx2Loader.setTranscoderPath('https://unpkg.com/three@0.132.2/examples/js/libs/basis/');
+    ktx2Loader.detectSupport(this.viewer.renderer);
+    this.loaders.gltf.setKTX2Loader(ktx2Loader);
+  }
+  
+  // meshopt-compressed geometry, when the page includes the decoder
+  if (typeof MeshoptDecoder !== 'undefined') {
+    this.loaders.gltf.setMeshoptDecoder(MeshoptDecoder);
+  }
 };
 
 /**
@@ -52,8 +94,8 @@ ModelLoader.prototype.load = function(url, options) {
   this.viewer.clearScene();
   this.currentUrl = url;
   
-  // Determine file type from extension
-  var fileExtension = this._getFileExtension(url).toLowerCase();
+  // Determine file type from extension, unless the caller names it (e.g. a served URL with no extension)
+  var fileExtension = (loadOptions.format || this._getFileExtension(url)).toLowerCase();
   this.currentModelType = fileExtension;
   
   // Trigger load start event
@@ -78,13 +120,16 @@ ModelLoader.prototype.load = function(url, options) {
   // Load model based on file type
   switch (fileExtension) {
     case 'obj':
+      this.release();
       this._loadOBJ(url, loadOptions);
       break;
     case 'glb':
     case 'gltf':
+      // Releases the previous model's cache entry once the new one is held
       this._loadGLTF(url, loadOptions);
       break;
     default:
+      this.release();
       var error = new Error('Unsupported file format: ' + fileExtension);
       this.viewer._triggerEvent('loadError', { url: url, error: error });
       console.error(error);
@@ -97,7 +142,10 @@ ModelLoader.prototype.load = function(url, options) {
  * Get file extension from URL
  */
 ModelLoader.prototype._getFileExtension = function(url) {
-  return url.split('.').pop().split('?')[0];
+  // Slice around the last '.' rather than splitting the whole URL into arrays
+  var queryStart = url.indexOf('?');
+  var path = queryStart === -1 ? url : url.substring(0, queryStart);
+  return path.substring(path.lastIndexOf('.') + 1);
 };
 
 /**
@@ -113,7 +161,7 @@ ModelLoader.prototype._getDirectoryPath = function(url) {
  * Get filename without extension
  */
 ModelLoader.prototype._getFilenameWithoutExtension = function(url) {
-  var filename = url.split('/').pop();
+  var filename = url.substring(url.lastIndexOf('/') + 1);
   return filename.substring(0, filename.lastIndexOf('.'));
 };
 
@@ -189,11 +237,38 @@ ModelLoader.prototype._loadGLTF = function(url, options) {
   var loader = this.loaders.gltf;
   var self = this;
   
-  loader.load(url, function(gltf) {
-    var model = gltf.scene;
+  // Fetch and decode each URL once; later loads get a clone sharing the GPU buffers
+  var entry = ModelLoader.gltfCache.get(url);
+  var fetching = !entry;
+  if (fetching) {
+    entry = {
+      refs: 0,
+      promise: new Promise(function(resolve, reject) {
+        loader.load(url, resolve, undefined, reject);
+      }).then(function(gltf) {
+        ModelLoader._markCached(gltf.scene);
+        return gltf;
+      })
+    };
+    ModelLoader.gltfCache.set(url, entry);
+  }
+  
+  // Hold the new entry before dropping the old one, so reloading a URL keeps it cached
+  entry.refs++;
+  this.release();
+  this._gltfEntry = entry;
+  var load = this._gltfLoad = {};
+  
+  entry.promise.then(function(gltf) {
+    // A later load or a release has superseded this one
+    if (self._gltfLoad !== load) return;
+    
+    // SkeletonUtils rebinds skinned meshes to the cloned bones; a plain clone keeps the originals
+    var model = THREE.SkeletonUtils ? THREE.SkeletonUtils.clone(gltf.scene) : gltf.scene.clone();
     
     // Handle animations if present
-    if (gltf.animations && gltf.animations.length) {
+    var animated = !!(gltf.animations && gltf.animations.length);
+    if (animated) {
       self.viewer.mixer = new THREE.AnimationMixer(model);
       
       for (var i = 0; i < gltf.animations.length; i++) {
@@ -206,34 +281,223 @@ ModelLoader.prototype._loadGLTF = function(url, options) {
       });
     }
     
-    self._processLoadedModel(model, options);
+    self._processLoadedModel(model, options, animated);
+    
+    // On a cache hit this viewer's LoadingManager never ran, so its onLoad won't announce the load
+    if (!fetching) {
+      self.viewer._triggerEvent('loadComplete');
+    }
+  }).catch(function(error) {
+    // Drop failed loads so a retry fetches again
+    if (ModelLoader.gltfCache.get(url) === entry) {
+      ModelLoader.gltfCache.delete(url);
+    }
+    if (self._gltfLoad === load) {
+      self.viewer._triggerEvent('loadError', { url: url, error: error });
+    }
+  });
+};
+
+/**
+ * Let go of the cached GLTF this loader is showing, if any.
+ * The last loader to release a URL evicts it and frees its GPU resources.
+ */
+ModelLoader.prototype.release = function() {
+  var entry = this._gltfEntry;
+  this._gltfEntry = null;
+  this._gltfLoad = null;
+  if (!entry || --entry.refs > 0) return;
+  
+  ModelLoader.gltfCache.forEach(function(value, key) {
+    if (value === entry) {
+      ModelLoader.gltfCache.delete(key);
+    }
+  });
+  entry.promise.then(function(gltf) {
+    ModelLoader._disposeCached(gltf.scene);
+  }, function() {});
+};
+
+/**
+ * Flag a cached scene's geometries, materials and textures as owned by the cache
+ */
+ModelLoader._markCached = function(scene) {
+  ModelLoader._forEachResource(scene, function(resource) {
+    resource.userData.gltfCached = true;
+  });
+};
+
+/**
+ * Free the GPU resources of an evicted cache entry
+ */
+ModelLoader._disposeCached = function(scene) {
+  ModelLoader._forEachResource(scene, function(resource) {
+    resource.dispose();
+  });
+};
+
+/**
+ * Call back with each geometry, material and material texture in a scene
+ */
+ModelLoader._forEachResource = function(scene, callback) {
+  scene.traverse(function(object) {
+    if (object.geometry) {
+      callback(object.geometry);
+    }
+    if (object.material) {
+      var materials = Array.isArray(object.material) ? object.material : [object.material];
+      for (var i = 0; i < materials.length; i++) {
+        for (var key in materials[i]) {
+          var value = materials[i][key];
+          if (value && value.isTexture) {
+            callback(value);
+          }
+        }
+        callback(materials[i]);
+      }
+    }
+  });
+};
+
+/**
+ * Replace meshes that repeat the same geometry and material with one InstancedMesh
+ */
+ModelLoader.prototype._instanceRepeatedMeshes = function(model) {
+  var groups = new Map();
+  
+  model.updateMatrixWorld(true);
+  model.traverse(function(object) {
+    // Meshes with children stay put: removing them would drop their subtree too
+    if (!object.isMesh || object.isSkinnedMesh || object.isInstancedMesh ||
+        Array.isArray(object.material) || object.children.length) {
+      return;
+    }
+    
+    var key = object.geometry.uuid + ':' + object.material.uuid;
+    if (!groups.has(key)) {
+      groups.set(key, []);
+    }
+    groups.get(key).push(object);
+  });
+  
+  var inverseRoot = new THREE.Matrix4().copy(model.matrixWorld).invert();
+  
+  groups.forEach(function(meshes) {
+    if (meshes.length < 2) return;
+    
+    var instanced = new THREE.InstancedMesh(meshes[0].geometry, meshes[0].material, meshes.length);
+    
+    // Culling would test only the base geometry's bounds, not where the instances are
+    instanced.frustumCulled = false;
+    for (var i = 0; i < meshes.length; i++) {
+      // Instance matrices are relative to the model root the InstancedMesh is added to
+      instanced.setMatrixAt(i, new THREE.Matrix4().multiplyMatrices(inverseRoot, meshes[i].matrixWorld));
+      meshes[i].parent.remove(meshes[i]);
+    }
+    model.add(instanced);
   });
 };
 
+/**
+ * Reveal a heavy model over several frames, largest meshes first.
+ * Small models are left alone and shown in one go.
+ */
+ModelLoader.prototype._setupProgressiveDisplay = function(model) {
+  var viewer = this.viewer;
+  
+  // Detach the previous model's handlers
+  if (this._progressiveStep) {
+    viewer.removeEventListener('animate', this._progressiveStep);
+    viewer.controls.removeEventListener('start', this._progressiveReset);
+    this._progressiveStep = null;
+    this._progressiveReset = null;
+  }
+  
+  var nodes = [];
+  var totalTriangles = 0;
+  
+  model.traverse(function(object) {
+    if (object.isMesh && object.geometry) {
+      var geometry = object.geometry;
+      var count = geometry.index ? geometry.index.count : geometry.attributes.position.count;
+      
+      // An instanced mesh draws its geometry once per instance
+      var triangles = count / 3 * (object.isInstancedMesh ? object.count : 1);
+      nodes.push({ object: object, triangles: triangles });
+      totalTriangles += triangles;
+    }
+  });
+  
+  if (totalTriangles <= ModelLoader.TRIANGLE_BUDGET) return;
+  
+  nodes.sort(function(a, b) { return b.triangles - a.triangles; });
+  var shown = 0;
+  
+  var reset = function() {
+    shown = 0;
+    for (var i = 0; i < nodes.length; i++) {
+      nodes[i].object.visible = false;
+    }
+  };
+  
+  var step = function() {
+    var drawn = 0;
+    while (shown < nodes.length && drawn < ModelLoader.TRIANGLE_BUDGET) {
+      nodes[shown].object.visible = true;
+      drawn += nodes[shown].triangles;
+      shown++;
+    }
+  };
+  
+  // Restart from the largest meshes whenever the user starts moving the camera
+  reset();
+  viewer.addEventListener('animate', step);
+  viewer.controls.addEventListener('start', reset);
+  
+  this._progressiveStep = step;
+  this._progressiveReset = reset;
+};
+
 /**
  * Process a loaded model (scale, center, add to scene)
  */
-ModelLoader.prototype._processLoadedModel = function(model, options) {
+ModelLoader.prototype._processLoadedModel = function(model, options, animated) {
   // Store reference to current model
   this.viewer.currentModel = model;
   
+  // One GPU upload and draw call for repeated parts. Animation tracks target
+  // nodes by name, so an animated model keeps its meshes as they are.
+  if (!animated) {
+    this._instanceRepeatedMeshes(model);
+  }
+  
+  // Keep frame time bounded on very heavy models
+  this._setupProgressiveDisplay(model);
+  
+  // Measure once; scaling and centering update this box instead of re-walking the meshes
+  var box = this._computeBoundingBox(model);
+  
   // Scale model
   if (options.scaleToFit) {
-    this._scaleModelToFit(model);
+    this._scaleModelToFit(model, box);
   } else if (options.scale !== 1.0) {
     model.scale.set(options.scale, options.scale, options.scale);
+    box.min.multiplyScalar(options.scale);
+    box.max.multiplyScalar(options.scale);
   }
   
   // Center model if requested
   if (options.centerModel) {
-    this._centerModel(model);
+    this._centerModel(model, box);
   }
   
   // Add model to scene
   this.viewer.scene.add(model);
   
   // Trigger load complete event with model info
-  var modelInfo = this._getModelInfo(model);
+  var modelInfo = this._getModelInfo(model, box);
+  console.debug('Model loaded: ' + modelInfo.faceCount + ' triangles, ' +
+                modelInfo.vertexCount + ' vertices');
   this.viewer._triggerEvent('modelLoaded', {
     model: model,
     type: this.currentModelType,
@@ -242,12 +506,42 @@ ModelLoader.prototype._processLoadedModel = function(model, options) {
   });
 };
 
+/**
+ * Compute the model's bounding box from each geometry's cached bounds
+ */
+ModelLoader.prototype._computeBoundingBox = function(model) {
+  var box = new THREE.Box3();
+  var partBox = new THREE.Box3();
+  var instanceMatrix = new THREE.Matrix4();
+  
+  model.updateMatrixWorld(true);
+  model.traverse(function(object) {
+    if (!object.isMesh || !object.geometry) return;
+    
+    var geometry = object.geometry;
+    if (!geometry.boundingBox) {
+      geometry.computeBoundingBox();
+    }
+    
+    if (object.isInstancedMesh) {
+      // Each instance is placed by its own matrix
+      for (var i = 0; i < object.count; i++) {
+        object.getMatrixAt(i, instanceMatrix);
+        instanceMatrix.premultiply(object.matrixWorld);
+        box.union(partBox.copy(geometry.boundingBox).applyMatrix4(instanceMatrix));
+      }
+    } else {
+      box.union(partBox.copy(geometry.boundingBox).applyMatrix4(object.matrixWorld));
+    }
+  });
+  
+  return box;
+};
+
 /**
  * Scale model to fit in view
  */
-ModelLoader.prototype._scaleModelToFit = function(model) {
-  // Create bounding box
-  var box = new THREE.Box3().setFromObject(model);
+ModelLoader.prototype._scaleModelToFit = function(model, box) {
   var size = box.getSize(new THREE.Vector3());
   
   // Get max dimension
@@ -258,18 +552,21 @@ ModelLoader.prototype._scaleModelToFit = function(model) {
   var scale = targetSize / maxDim;
   
   model.scale.set(scale, scale, scale);
+  
+  // The root starts at the origin, so scaling it scales the box about the origin too
+  box.min.multiplyScalar(scale);
+  box.max.multiplyScalar(scale);
 };
 
 /**
  * Center model in scene
  */
-ModelLoader.prototype._centerModel = function(model) {
-  // Create bounding box
-  var box = new THREE.Box3().setFromObject(model);
+ModelLoader.prototype._centerModel = function(model, box) {
   var center = box.getCenter(new THREE.Vector3());
   
   // Move model so its center is at (0,0,0)
   model.position.sub(center);
+  box.translate(center.negate());
   
   // Update controls target
   if (this.viewer.controls) {
@@ -281,7 +578,7 @@ ModelLoader.prototype._centerModel = function(model) {
 /**
  * Get information about the model
  */
-ModelLoader.prototype._getModelInfo = function(model) {
+ModelLoader.prototype._getModelInfo = function(model, box) {
   var vertexCount = 0;
   var faceCount = 0;
   var materialCount = 0;
@@ -316,8 +613,6 @@ ModelLoader.prototype._getModelInfo = function(model) {
   
   materialCount = materials.size;
   
-  // Create bounding box
-  var box = new THREE.Box3().setFromObject(model);
   var size = box.getSize(new THREE.Vector3());
   
   return {
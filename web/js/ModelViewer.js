@@ -49,6 +49,7 @@ function ModelViewer(options) {
   this.currentModel = null;
   this.loadingManager = null;
   this.eventListeners = {};
+  this._rafId = null;
 
   // Initialize components
   this._initRenderer();
@@ -59,11 +60,12 @@ function ModelViewer(options) {
   this._initClock();
   this._initLoadingManager();
   
-  // Handle window resize
+  // Handle window resize (keep the handler so dispose can remove it)
   var self = this;
-  window.addEventListener('resize', function() {
+  this._onResize = function() {
     self._handleResize();
-  });
+  };
+  window.addEventListener('resize', this._onResize);
   
   // Start animation loop
   this._animate();
@@ -218,7 +220,7 @@ ModelViewer.prototype._handleResize = function() {
 ModelViewer.prototype._animate = function() {
   var self = this;
   
-  requestAnimationFrame(function() {
+  this._rafId = requestAnimationFrame(function() {
     self._animate();
   });
   
@@ -370,14 +372,56 @@ ModelViewer.prototype.clearScene = function() {
  * Dispose of the viewer and all its resources
  */
 ModelViewer.prototype.dispose = function() {
+  // Stop the render loop
+  if (this._rafId !== null) {
+    cancelAnimationFrame(this._rafId);
+    this._rafId = null;
+  }
+  
   // Remove event listeners
-  window.removeEventListener('resize', this._handleResize);
+  window.removeEventListener('resize', this._onResize);
+  
+  // Let loaders release shared models; the cache frees those once nobody shows them
+  this._triggerEvent('dispose');
+  
+  // Free GPU buffers and textures before dropping the scene graph, skipping
+  // anything the GLTF cache owns since other viewers may still draw with it
+  if (this.scene) {
+    var owned = function(resource) {
+      return !(resource.userData && resource.userData.gltfCached);
+    };
+    
+    this.scene.traverse(function(object) {
+      if (object.geometry && owned(object.geometry)) {
+        object.geometry.dispose();
+      }
+      
+      if (object.material) {
+        var materials = Array.isArray(object.material) ? object.material : [object.material];
+        for (var i = 0; i < materials.length; i++) {
+          if (!owned(materials[i])) continue;
+          for (var key in materials[i]) {
+            var value = materials[i][key];
+            if (value && value.isTexture && owned(value)) {
+              value.dispose();
+            }
+          }
+          materials[i].dispose();
+        }
+      }
+    });
+    
+    if (this.scene.environment) {
+      this.scene.environment.dispose();
+    }
+  }
   
   // Dispose of Three.js objects
   this.clearScene();
   
   if (this.renderer) {
     this.renderer.dispose();
+    this.renderer.forceContextLoss();
     this.container.removeChild(this.renderer.domElement);
   }
   
@@ -26,11 +26,22 @@ script.onload = () => {
 
 // At the top of the file
 const DEBUG = true;
+
+// The server only accepts logs when started with TRELLIS_DEBUG; ask once instead of
+// sending every line to an endpoint that would refuse it
+let backendDebug = false;
+api.fetchApi('/trellis/check')
+    .then(response => response.json())
+    .then(info => { backendDebug = info.debug === true; })
+    .catch(() => {});
+
 function debug(...args) {
     if (DEBUG) {
         console.log("[Trellis]", ...args);
         // Send to backend for logging
-        logToBackend("JavaScript", args);
+        if (backendDebug) {
+            logToBackend("JavaScript", args);
+        }
     }
 }
 
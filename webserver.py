@@ -1,173 +1,467 @@
+import asyncio
+import functools
+import gzip
+import html
+import json
+import logging
 import os
+import socket
+import sys
+import tempfile
+import time
 import server
+from pathlib import Path
+import aiohttp
 from aiohttp import web
 
+# Brotli is optional; gzip alone still covers every browser
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger('TrellisWebServer')
+
 # Get the directory where this file is located
 base_path = os.path.dirname(os.path.realpath(__file__))
-trellis_downloads_dir = os.path.join(os.getcwd(), "trellis_downloads")
+
+# Resolved once at import: symlinks and a later chdir can't change where files are served from
+TRELLIS_DOWNLOADS = (Path.cwd() / "trellis_downloads").resolve()
+trellis_downloads_dir = str(TRELLIS_DOWNLOADS)
+
+# File paths are built by plain concatenation onto this prefix
+_DOWNLOADS_PREFIX = trellis_downloads_dir + os.sep
+_GLB_SUFFIX = "_output.glb"
+
+# Ids are generated names. Media routes only match ids of this form, so anything else
+# is a 404 from the router itself, before any handler runs or the disk is touched
+ID_PATTERN = "[A-Za-z0-9_-]{1,64}"
+
+# Read size for FileResponse when it can't use sendfile (e.g. TLS); models and videos are multi-MB
+FILE_CHUNK_SIZE = 1024 * 1024
+
+# Revalidate hourly by default; a URL carrying the file's current version never goes stale
+DEFAULT_CACHE_CONTROL = "public, max-age=3600"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def _file_version(st):
+    """Fingerprint from mtime and size; changes whenever the file is rewritten"""
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+def _file_etag(st):
+    """Weak validator built from the file's version"""
+    return f'W/"{_file_version(st)}"'
+
+def _is_not_modified(request, etag):
+    """Whether the client's If-None-Match already names this ETag"""
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: W/"x" and "x" name the same representation
+    return "*" in candidates or etag in candidates or etag[2:] in candidates
+
+# Stat results (misses included) are reused for this long; a viewer page and the model
+# request it triggers, or a burst of polls for one id, then cost a single stat
+STAT_CACHE_TTL = 1.0
+STAT_CACHE_MAX = 4096
+_stat_cache = {}
+
+async def _stat(path, cached=True):
+    """os.stat off the event loop so a slow disk stalls one request, not the whole server.
+    
+    Results are cached for STAT_CACHE_TTL; None means the file isn't there.
+    Stats that become a response's validator pass cached=False, so a file
+    replaced within the TTL is never answered with its predecessor's ETag.
+    """
+    now = time.monotonic()
+    entry = _stat_cache.get(path) if cached else None
+    if entry is not None and now - entry[0] < STAT_CACHE_TTL:
+        return entry[1]
+    try:
+        st = await asyncio.get_running_loop().run_in_executor(None, os.stat, path)
+    except OSError:
+        st = None
+    if len(_stat_cache) >= STAT_CACHE_MAX:
+        _stat_cache.clear()
+    _stat_cache[path] = (now, st)
+    return st
+
+def file_response(request, path, st, headers=None):
+    """FileResponse with ETag revalidation for a file that has already been stat'ed"""
+    etag = _file_etag(st)
+    headers = {"Cache-Control": DEFAULT_CACHE_CONTROL, **(headers or {}), "ETag": etag}
+    if _is_not_modified(request, etag):
+        return web.Response(status=304, headers=headers)
+    
+    # FileResponse adds Last-Modified, answers If-Modified-Since and turns a Range
+    # request into a 206; advertising it lets <video> seek without refetching from byte 0
+    headers["Accept-Ranges"] = "bytes"
+    return _LimitedFileResponse(path, chunk_size=FILE_CHUNK_SIZE, headers=headers)
+
+async def serve_file(request, path, not_found_text, headers=None):
+    """Serve a file; one fresh stat covers existence and the validator.
+    
+    Every Trellis route that sends a file from disk goes through here, so
+    conditional requests and caching behave the same on all of them.
+    """
+    st = await _stat(path, cached=False)
+    if st is None:
+        return web.Response(status=404, text=not_found_text)
+    return file_response(request, path, st, headers)
+
+# Large transfers in flight at once; beyond this new downloads get a 503 instead of queueing
+MAX_CONCURRENT_FILE_RESPONSES = 16
+_file_slots = asyncio.Semaphore(MAX_CONCURRENT_FILE_RESPONSES)
+
+class _LimitedFileResponse(web.FileResponse):
+    """FileResponse that holds a transfer slot while aiohttp sends it.
+    
+    aiohttp calls prepare() once, after the handler has returned, and prepare()
+    streams the whole body, so the slot is held for exactly the transfer. The
+    handler never prepares the response itself.
+    """
+    
+    async def prepare(self, request):
+        async with _file_slots:
+            # Corked, the headers go out in the same segment as the start of the body
+            _set_cork(request, True)
+            try:
+                return await super().prepare(request)
+            finally:
+                _set_cork(request, False)
+
+def _send_limited(response):
+    """Turn a file response away with a 503 while every transfer slot is taken"""
+    if isinstance(response, _LimitedFileResponse) and _file_slots.locked():
+        return web.Response(status=503, headers={"Retry-After": "1"}, text="Server busy")
+    return response
+
+def _set_cork(request, enabled):
+    """Toggle TCP_CORK on the request's socket where the platform has it (Linux)"""
+    if not hasattr(socket, "TCP_CORK") or request.transport is None:
+        return
+    sock = request.transport.get_extra_info("socket")
+    if sock is None:
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, int(enabled))
+    except OSError:
+        # Not a TCP socket (e.g. a unix socket); nothing to coalesce
+        pass
+
+# Fixed headers for every model response; the type is known, so nothing is guessed per hit
+_MODEL_HEADERS = {
+    "Content-Type": "model/gltf-binary",
+    "Content-Disposition": "inline",
+    "Vary": "Accept-Encoding"
+}
+_IMMUTABLE_MODEL_HEADERS = {**_MODEL_HEADERS, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+
+# Standalone viewer pages read their id from the query string, so they are plain
+# static files and go out through FileResponse/sendfile like any other asset
+VIEWER_PAGES_DIR = os.path.join(base_path, "web")
+server.PromptServer.instance.app.router.add_static("/trellis/view/", VIEWER_PAGES_DIR)
+
+# Downloaded files are served straight from disk by aiohttp's StaticResource, which
+# handles Range, conditional requests and sendfile without a handler of our own
+os.makedirs(trellis_downloads_dir, exist_ok=True)
+server.PromptServer.instance.app.router.add_static("/trellis/files/", trellis_downloads_dir,
+                                                   show_index=False, chunk_size=FILE_CHUNK_SIZE)
+
+# Viewer scripts are fetched from their CDN once, concatenated into a single file and
+# served from this origin, instead of several CDN connections on every page open.
+# Each bundle name carries its library version, so the file never changes under it.
+# - model-viewer: the <model-viewer> web component (one ES module with three.js built in)
+# - three: three.js plus the controls and loader used by web/model-viewer.html
+MODEL_VIEWER_VERSION = "3.5.0"
+THREE_VERSION = "0.132.2"
+_VIEWER_BUNDLE_NAME = f"model-viewer-{MODEL_VIEWER_VERSION}.min.js"
+_THREE_BUNDLE_NAME = f"three-{THREE_VERSION}-viewer.min.js"
+_SCRIPT_BUNDLES = {
+    _VIEWER_BUNDLE_NAME: (
+        f"https://cdn.jsdelivr.net/npm/@google/model-viewer@{MODEL_VIEWER_VERSION}/dist/model-viewer.min.js",
+    ),
+    _THREE_BUNDLE_NAME: (
+        f"https://cdn.jsdelivr.net/npm/three@{THREE_VERSION}/build/three.min.js",
+        f"https://cdn.jsdelivr.net/npm/three@{THREE_VERSION}/examples/js/controls/OrbitControls.js",
+        f"https://cdn.jsdelivr.net/npm/three@{THREE_VERSION}/examples/js/loaders/GLTFLoader.js",
+    ),
+}
+_STATIC_DIR = os.path.join(base_path, "trellis_static")
+_BUNDLE_HEADERS = {
+    "Content-Type": "application/javascript",
+    "Cache-Control": IMMUTABLE_CACHE_CONTROL
+}
+
+# Set while the startup task is still fetching bundles
+_bundles_building = False
+
+def _write_bundle(bundle_path, parts):
+    """Write a bundle under a unique temporary name and rename it into place"""
+    os.makedirs(_STATIC_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=_STATIC_DIR, prefix=os.path.basename(bundle_path) + ".",
+                                    suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b"\n;\n".join(parts))
+        os.replace(tmp_path, bundle_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+async def _build_bundles():
+    """Fetch every bundle that isn't on disk yet; runs once, in the background, at startup"""
+    global _bundles_building
+    loop = asyncio.get_running_loop()
+    try:
+        async with aiohttp.ClientSession() as session:
+            for name, urls in _SCRIPT_BUNDLES.items():
+                bundle_path = os.path.join(_STATIC_DIR, name)
+                if await _stat(bundle_path, cached=False) is not None:
+                    continue
+                try:
+                    parts = []
+                    for url in urls:
+                        async with session.get(url) as response:
+                            response.raise_for_status()
+                            parts.append(await response.read())
+                    await loop.run_in_executor(None, _write_bundle, bundle_path, parts)
+                    logger.info("Built viewer script bundle at %s", bundle_path)
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                    logger.error("Could not build viewer script bundle %s: %s", name, e)
+    finally:
+        _bundles_building = False
+
+async def _start_bundle_build(app):
+    # Started as a task so an offline CDN never holds up server startup
+    global _bundles_building
+    _bundles_building = True
+    app["trellis_bundle_build"] = asyncio.create_task(_build_bundles())
+
+server.PromptServer.instance.app.on_startup.append(_start_bundle_build)
+
+@server.PromptServer.instance.routes.get("/trellis/static/{bundle_name}")
+async def get_script_bundle(request):
+    """Serve a prebuilt bundle from disk; requests never reach out to the CDN"""
+    name = request.match_info["bundle_name"]
+    if name not in _SCRIPT_BUNDLES:
+        return web.Response(status=404, text="Not found")
+    
+    bundle_path = os.path.join(_STATIC_DIR, name)
+    st = await _stat(bundle_path, cached=False)
+    if st is None:
+        if _bundles_building:
+            return web.Response(status=503, headers={"Retry-After": "5"},
+                                text="Viewer scripts are still being fetched")
+        return web.Response(status=502, text="Viewer scripts unavailable")
+    return file_response(request, bundle_path, st, _BUNDLE_HEADERS)
 
 # Add our routes to ComfyUI's server
-@server.PromptServer.instance.routes.get("/trellis/model/{model_id}")
+@server.PromptServer.instance.routes.get(f"/trellis/model/{{model_id:{ID_PATTERN}}}")
 async def get_trellis_model(request):
-    model_id = request.match_info["model_id"]
-    model_path = os.path.join(trellis_downloads_dir, f"{model_id}_output.glb")
+    return _send_limited(await _model_response(request))
+
+# model_id -> SHA-256 of its GLB, written by the client node at download time. It is
+# kept beside the downloads directory, so the /trellis/files/ mount never exposes it.
+_MANIFEST_PATH = str(TRELLIS_DOWNLOADS.parent / "trellis_meta" / "manifest.json")
+_manifest = {}
+_manifest_mtime_ns = None
+
+def _read_manifest():
+    with open(_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+async def _content_hash(model_id):
+    """SHA-256 recorded for a model, or None.
+    
+    The manifest's mtime is checked on every call, so an id re-downloaded
+    with new content is never answered with its old hash; the file itself
+    is only re-read after it changes, and off the event loop.
+    """
+    global _manifest, _manifest_mtime_ns
+    st = await _stat(_MANIFEST_PATH, cached=False)
+    if st is None:
+        _manifest, _manifest_mtime_ns = {}, None
+    elif st.st_mtime_ns != _manifest_mtime_ns:
+        try:
+            _manifest = await asyncio.get_running_loop().run_in_executor(None, _read_manifest)
+            _manifest_mtime_ns = st.st_mtime_ns
+        except (OSError, ValueError) as e:
+            logger.warning("Could not read model manifest: %s", e)
+    return _manifest.get(model_id)
+
+async def _model_version(model_id):
+    """Version to fingerprint a model URL with: its content hash, else its mtime/size"""
+    digest = await _content_hash(model_id)
+    if digest is not None:
+        return digest
+    st = await _stat(_DOWNLOADS_PREFIX + model_id + _GLB_SUFFIX)
+    return _file_version(st) if st is not None else None
+
+async def _model_response(request):
+    # Interned, so the manifest and stat caches compare a repeatedly polled id by identity
+    model_id = sys.intern(request.match_info["model_id"])
+    immutable = False
+    version = request.query.get("v")
     
-    if not os.path.exists(model_path):
-        return web.Response(status=404, text=f"Model {model_id} not found")
+    # Models with a recorded hash are served from their content file, whose bytes never change
+    digest = await _content_hash(model_id)
+    if digest is not None:
+        model_path = _DOWNLOADS_PREFIX + digest + ".glb"
+        immutable = version == digest
+    else:
+        model_path = _DOWNLOADS_PREFIX + model_id + _GLB_SUFFIX
+        # Viewer pages add ?v=<version>; while it names the current file the response can't change
+        if version is not None:
+            st = await _stat(model_path, cached=False)
+            immutable = st is not None and version == _file_version(st)
     
-    return web.FileResponse(model_path)
+    # FileResponse sends the .br/.gz sibling written at download time when the client
+    # accepts it and sets Content-Encoding itself; still a plain file, so sendfile applies
+    headers = _IMMUTABLE_MODEL_HEADERS if immutable else _MODEL_HEADERS
+    return await serve_file(request, model_path, f"Model {model_id} not found", headers)
 
-@server.PromptServer.instance.routes.get("/trellis/video/{video_id}")
+@server.PromptServer.instance.routes.get(f"/trellis/video/{{video_id:{ID_PATTERN}}}")
 async def get_trellis_video(request):
+    # Kept for old links; videos are served by the static /trellis/files/ route
     video_id = request.match_info["video_id"]
-    video_path = os.path.join(trellis_downloads_dir, f"{video_id}_output.mp4")
+    raise web.HTTPMovedPermanently(f"/trellis/files/{video_id}_output.mp4")
+
+# The model viewer page differs only by the id in one URL, so it is kept as encoded
+# halves split at that spot and joined per request
+_MODEL_PAGE_HEAD, _MODEL_PAGE_TAIL = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Trellis 3D Model Viewer</title>
+    <style>
+        body { margin: 0; padding: 0; overflow: hidden; background: #333333; }
+        model-viewer { width: 100%; height: 100vh; }
+    </style>
+    <script type="module" src="/trellis/static/$bundle_name"></script>
+</head>
+<body>
+    <model-viewer src="/trellis/model/$model_id" camera-controls auto-rotate></model-viewer>
+</body>
+</html>
+""".replace("$bundle_name", _VIEWER_BUNDLE_NAME).encode("utf-8").split(b"$model_id")
+
+def _html_id(page_id):
+    """An id (or id?v=version) escaped for an HTML attribute, as bytes.
     
-    if not os.path.exists(video_path):
-        return web.Response(status=404, text=f"Video {video_id} not found")
+    Ids that matched ID_PATTERN come through unchanged; the escape keeps the
+    pages well-formed should the id pattern ever be loosened.
+    """
+    return html.escape(page_id).encode("ascii", "xmlcharrefreplace")
+
+@functools.lru_cache(maxsize=64)
+def _parse_accept_encoding(header):
+    """Accept-Encoding as {coding: q}; browsers send a handful of distinct values, so cached"""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+def _negotiate_encodings(request, options):
+    """The (encoding, value) pairs from options the client accepts, best first.
     
-    return web.FileResponse(video_path)
+    Codings are matched as whole tokens, q=0 rules one out and "*" stands for
+    any coding the header doesn't name. Higher q wins; ties keep the order of
+    options, which is the server's preference.
+    """
+    accepted = _parse_accept_encoding(request.headers.get("Accept-Encoding", ""))
+    wildcard = accepted.get("*", 0.0)
+    ranked = []
+    for option in options:
+        q = accepted.get(option[0], wildcard)
+        if q > 0:
+            ranked.append((q, option))
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    return [option for _, option in ranked]
 
-@server.PromptServer.instance.routes.get("/trellis/view-model/{model_id}")
-async def view_model(request):
-    model_id = request.match_info["model_id"]
+# Encoders for viewer pages, in order of preference
+_PAGE_ENCODERS = (("gzip", lambda body: gzip.compress(body, compresslevel=9, mtime=0)),)
+if brotli is not None:
+    _PAGE_ENCODERS = (("br", lambda body: brotli.compress(body, quality=11)),) + _PAGE_ENCODERS
+
+# Header sets for viewer pages, shared by every response instead of built per request
+_PAGE_HEADERS = {"Content-Type": "text/html; charset=utf-8", "Vary": "Accept-Encoding"}
+_ENCODED_PAGE_HEADERS = {
+    encoding: {**_PAGE_HEADERS, "Content-Encoding": encoding} for encoding, _ in _PAGE_ENCODERS
+}
+
+@functools.lru_cache(maxsize=256)
+def _compressed_page(head, page_id, tail, encoding):
+    """A page compressed once per id; compressed halves can't simply be joined"""
+    for name, compress in _PAGE_ENCODERS:
+        if name == encoding:
+            return compress(head + _html_id(page_id) + tail)
+
+async def _stream_page(request, head, page_id, tail):
+    """Send a viewer page head first, so the browser starts on its scripts right away.
     
-    # Simple HTML page with Three.js for 3D model viewing
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Trellis 3D Model Viewer</title>
-        <style>
-            body {{ margin: 0; padding: 0; overflow: hidden; }}
-            canvas {{ width: 100%; height: 100%; display: block; }}
-        </style>
-    </head>
-    <body>
-        <script src="https://cdn.jsdelivr.net/npm/three@0.157.0/build/three.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/three@0.157.0/examples/js/controls/OrbitControls.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/three@0.157.0/examples/js/loaders/GLTFLoader.js"></script>
-        <script>
-            const scene = new THREE.Scene();
-            scene.background = new THREE.Color(0x333333);
-            
-            const camera = new THREE.PerspectiveCamera(75, window.innerWidth / window.innerHeight, 0.1, 1000);
-            camera.position.z = 5;
-            
-            const renderer = new THREE.WebGLRenderer();
-            renderer.setSize(window.innerWidth, window.innerHeight);
-            document.body.appendChild(renderer.domElement);
-            
-            // Add lights
-            const ambientLight = new THREE.AmbientLight(0xffffff, 0.5);
-            scene.add(ambientLight);
-            
-            const directionalLight = new THREE.DirectionalLight(0xffffff, 1);
-            directionalLight.position.set(0, 1, 1);
-            scene.add(directionalLight);
-            
-            // Add controls
-            const controls = new THREE.OrbitControls(camera, renderer.domElement);
-            controls.enableDamping = true;
-            controls.dampingFactor = 0.25;
-            
-            // Load the model
-            const loader = new THREE.GLTFLoader();
-            loader.load('/trellis/model/{model_id}', (gltf) => {{
-                const model = gltf.scene;
-                scene.add(model);
-                
-                // Center the model
-                const box = new THREE.Box3().setFromObject(model);
-                const center = box.getCenter(new THREE.Vector3());
-                const size = box.getSize(new THREE.Vector3());
-                
-                // Adjust camera position based on model size
-                const maxDim = Math.max(size.x, size.y, size.z);
-                camera.position.set(center.x, center.y, center.z + maxDim * 2);
-                controls.target.copy(center);
-                controls.update();
-            }});
-            
-            // Handle window resize
-            window.addEventListener('resize', () => {{
-                camera.aspect = window.innerWidth / window.innerHeight;
-                camera.updateProjectionMatrix();
-                renderer.setSize(window.innerWidth, window.innerHeight);
-            }});
-            
-            // Animation loop
-            function animate() {{
-                requestAnimationFrame(animate);
-                controls.update();
-                renderer.render(scene, camera);
-            }}
-            animate();
-        </script>
-    </body>
-    </html>
+    Clients that accept br/gzip get the page compressed in one piece instead.
     """
+    encoders = _negotiate_encodings(request, _PAGE_ENCODERS)
+    if encoders:
+        encoding = encoders[0][0]
+        body = _compressed_page(head, page_id, tail, encoding)
+        return web.Response(body=body, headers=_ENCODED_PAGE_HEADERS[encoding])
     
-    return web.Response(text=html, content_type="text/html")
+    middle = _html_id(page_id)
+    response = web.StreamResponse(headers=_PAGE_HEADERS)
+    response.content_length = len(head) + len(middle) + len(tail)
+    await response.prepare(request)
+    await response.write(head)
+    await response.write(middle + tail)
+    await response.write_eof()
+    return response
 
-@server.PromptServer.instance.routes.get("/trellis/view-video/{video_id}")
+@server.PromptServer.instance.routes.get(f"/trellis/viewer/model/{{model_id:{ID_PATTERN}}}")
+async def view_model(request):
+    model_id = request.match_info["model_id"]
+    
+    # Fingerprint the model URL so the browser can cache the GLB without revalidating
+    version = await _model_version(model_id)
+    if version is not None:
+        model_id = f"{model_id}?v={version}"
+    return await _stream_page(request, _MODEL_PAGE_HEAD, model_id, _MODEL_PAGE_TAIL)
+
+@server.PromptServer.instance.routes.get(f"/trellis/viewer/video/{{video_id:{ID_PATTERN}}}")
 async def view_video(request):
+    # One video player for every entry point: the static page reads the id from its query
     video_id = request.match_info["video_id"]
-    
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Trellis Video Player</title>
-        <style>
-            body {{ margin: 0; padding: 0; overflow: hidden; background: #222; }}
-            .container {{ display: flex; justify-content: center; align-items: center; height: 100vh; }}
-            video {{ max-width: 100%; max-height: 100vh; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <video controls autoplay loop>
-                <source src="/trellis/video/{video_id}" type="video/mp4">
-                Your browser does not support the video tag.
-            </video>
-        </div>
-    </body>
-    </html>
-    """
-    
-    return web.Response(text=html, content_type="text/html")
+    raise web.HTTPFound(f"/trellis/view/video-player.html?video_id={video_id}")
+
+# Node embeds used to wrap the viewer pages in an iframe of their own; an embed
+# can load the page itself, so these just point there. The target for an id
+# never changes, so the redirect may be cached
+_NODE_REDIRECT_HEADERS = {"Cache-Control": "public, max-age=86400"}
 
-# Enable nodes to directly embed viewers in the UI
-@server.PromptServer.instance.routes.get("/trellis/node/view-model/{model_id}")
+@server.PromptServer.instance.routes.get(f"/trellis/node/view-model/{{model_id:{ID_PATTERN}}}")
 async def node_view_model(request):
     model_id = request.match_info["model_id"]
-    
-    # Small-sized embedded viewer for nodes
-    html = f"""
-    <iframe 
-        src="/trellis/view-model/{model_id}" 
-        style="width: 100%; height: 100%; border: none;"
-        allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture"
-        allowfullscreen
-    ></iframe>
-    """
-    
-    return web.Response(text=html, content_type="text/html")
+    raise web.HTTPFound(f"/trellis/view/model-viewer.html?model_id={model_id}",
+                        headers=_NODE_REDIRECT_HEADERS)
 
-@server.PromptServer.instance.routes.get("/trellis/node/view-video/{video_id}")
+@server.PromptServer.instance.routes.get(f"/trellis/node/view-video/{{video_id:{ID_PATTERN}}}")
 async def node_view_video(request):
     video_id = request.match_info["video_id"]
-    
-    # Small-sized embedded viewer for nodes
-    html = f"""
-    <iframe 
-        src="/trellis/view-video/{video_id}" 
-        style="width: 100%; height: 100%; border: none;"
-        allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture"
-        allowfullscreen
-    ></iframe>
-    """
-    
-    return web.Response(text=html, content_type="text/html")
\ No newline at end of file
+    raise web.HTTPFound(f"/trellis/view/video-player.html?video_id={video_id}",
+                        headers=_NODE_REDIRECT_HEADERS)